@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+# Importing font_archiver creates its run directory and log file under the temporary
+# directory, so point it at one that is removed again once the tests are done
+_TEMP_ROOT = tempfile.mkdtemp(prefix="font_archiver_tests_")
+tempfile.tempdir = _TEMP_ROOT
+try:
+    import font_archiver
+finally:
+    tempfile.tempdir = None
+signal.signal(signal.SIGINT, signal.default_int_handler)
+
+
+def tearDownModule():
+    font_archiver.logger.removeHandler(font_archiver.file_handler)
+    font_archiver.file_handler.close()
+    shutil.rmtree(_TEMP_ROOT, ignore_errors=True)
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory(dir=_TEMP_ROOT)
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_file(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+class AttemptZipCreationWithRetryTest(TempDirTestCase):
+    def attempt_missing_font(self):
+        font_path = os.path.join(self.temp_dir.name, "Missing-Regular.ttf")
+        zip_path = os.path.join(self.temp_dir.name, "Missing.7z")
+
+        with mock.patch.object(font_archiver.time, "sleep") as sleep, \
+                mock.patch.object(font_archiver, "_create_zip_with_strategy",
+                                  wraps=font_archiver._create_zip_with_strategy) as strategy:
+            success, _, size = font_archiver._attempt_zip_creation_with_retry("Missing", [font_path], zip_path)
+
+        self.assertFalse(success)
+        self.assertEqual(size, 0)
+        strategy.assert_called_once()
+        sleep.assert_not_called()
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_missing_font_is_not_retried_with_zipfile(self):
+        with mock.patch.object(font_archiver, "_is_7zip_available", return_value=False):
+            self.attempt_missing_font()
+
+    def test_missing_font_is_not_retried_with_7zip(self):
+        def run_7zip(args):
+            # 7z writes an archive without files and warns about the missing font
+            with open(args[-2], 'wb') as f:
+                f.write(b'7z\xbc\xaf\x27\x1c' + bytes(26))
+            return 1, "WARNING: The system cannot find the file specified."
+
+        with mock.patch.object(font_archiver, "_is_7zip_available", return_value=True), \
+                mock.patch.object(font_archiver, "_run_7zip", side_effect=run_7zip) as run:
+            self.attempt_missing_font()
+        run.assert_called_once()
+
+
+class HandleExistingZipTest(TempDirTestCase):
+    def test_locked_archive_raises_after_retries(self):
+        zip_path = self.write_file("Locked.zip", b"stale")
+
+        with mock.patch.object(font_archiver.time, "sleep"), \
+                mock.patch.object(font_archiver.os, "remove", side_effect=PermissionError(13, "locked")) as remove:
+            with self.assertRaises(PermissionError):
+                font_archiver._handle_existing_zip(zip_path)
+
+        self.assertEqual(remove.call_count, 3)
+        self.assertTrue(os.path.exists(zip_path))
+
+    def test_locked_archive_fails_the_family(self):
+        zip_path = self.write_file("Locked.zip", b"stale")
+        font_path = self.write_file("Font.ttf", b"\x00\x01\x00\x00font")
+        real_remove = os.remove
+
+        def remove(path):
+            if path == zip_path:
+                raise PermissionError(13, "locked", path)
+            real_remove(path)
+
+        with mock.patch.object(font_archiver, "_is_7zip_available", return_value=False), \
+                mock.patch.object(font_archiver.time, "sleep"), \
+                mock.patch.object(font_archiver.os, "remove", side_effect=remove):
+            result = font_archiver.create_zip_for_family("Locked", [font_path], self.temp_dir.name)
+
+        self.assertEqual(result, (None, 0))
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ["Font.ttf", "Locked.zip"])
+
+
+class FamilyCacheTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_file = os.path.join(self.temp_dir.name, "family_cache.json")
+        for patcher in (mock.patch.object(font_archiver, "FAMILY_CACHE_FILE", self.cache_file),
+                        mock.patch.dict(font_archiver._family_cache, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_save_and_load_round_trip(self):
+        font_archiver._family_cache["a.ttf"] = (1.5, 10, "Alpha")
+        font_archiver._family_cache["b.ttf"] = (2.5, 20, None)
+        font_archiver._save_family_cache()
+
+        font_archiver._family_cache.clear()
+        font_archiver._load_family_cache()
+
+        self.assertEqual(font_archiver._family_cache, {"a.ttf": (1.5, 10, "Alpha"), "b.ttf": (2.5, 20, None)})
+        self.assertFalse(os.path.exists(self.cache_file + ".tmp"))
+
+    def test_load_ignores_corrupt_cache(self):
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({"a.ttf": [1.5, 10]}, f)
+
+        font_archiver._load_family_cache()
+
+        self.assertEqual(font_archiver._family_cache, {})
+
+    def test_load_without_cache_file(self):
+        font_archiver._load_family_cache()
+
+        self.assertEqual(font_archiver._family_cache, {})
+
+    def test_prune_drops_fonts_not_scanned(self):
+        font_archiver._family_cache.update({"a.ttf": (1.0, 1, "A"), "b.ttf": (2.0, 2, "B")})
+
+        font_archiver._prune_family_cache({"a.ttf", "c.ttf"})
+
+        self.assertEqual(font_archiver._family_cache, {"a.ttf": (1.0, 1, "A")})
+
+    def test_unchanged_font_is_not_parsed_again(self):
+        font_path = self.write_file("Font.ttf", b"\x00\x01\x00\x00font")
+        stat_result = os.stat(font_path)
+        font_archiver._family_cache[font_path] = (stat_result.st_mtime, stat_result.st_size, "Cached")
+
+        with mock.patch.object(font_archiver, "_read_font_family") as read_font_family:
+            family = font_archiver.get_font_family(font_path, stat_result)
+
+        self.assertEqual(family, "Cached")
+        read_font_family.assert_not_called()
+
+
+class DropDuplicateFontsTest(TempDirTestCase):
+    def test_drops_later_copies_only(self):
+        original = self.write_file("Original.ttf", b"same contents")
+        copy = self.write_file("Copy.ttf", b"same contents")
+        same_size = self.write_file("SameSize.ttf", b"other content")
+        unique = self.write_file("Unique.ttf", b"unique")
+        font_files = [(path, os.stat(path)) for path in (original, copy, same_size, unique)]
+
+        result = font_archiver._drop_duplicate_fonts(font_files)
+
+        self.assertEqual([path for path, _ in result], [original, same_size, unique])
+
+    def test_unique_sizes_are_not_read(self):
+        first = self.write_file("First.ttf", b"a")
+        second = self.write_file("Second.ttf", b"bb")
+        font_files = [(path, os.stat(path)) for path in (first, second)]
+
+        with mock.patch.object(font_archiver, "_hash_font_file") as hash_font_file:
+            result = font_archiver._drop_duplicate_fonts(font_files)
+
+        self.assertEqual(result, font_files)
+        hash_font_file.assert_not_called()
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class GitBlobShaTest(TempDirTestCase):
+    def git_hash_object(self, path):
+        return subprocess.run(["git", "hash-object", path], check=True, capture_output=True,
+                              text=True).stdout.strip()
+
+    def test_matches_git_hash_object(self):
+        for name, data in (("empty.bin", b""), ("font.ttf", bytes(range(256)) * 4099)):
+            path = self.write_file(name, data)
+            with self.subTest(name=name):
+                self.assertEqual(font_archiver._get_git_blob_sha(path, len(data)), self.git_hash_object(path))
+
+    def test_is_blob_unchanged(self):
+        path = self.write_file("font.ttf", b"font data")
+        sha = self.git_hash_object(path)
+
+        self.assertTrue(font_archiver._is_blob_unchanged(path, 9, sha))
+        self.assertFalse(font_archiver._is_blob_unchanged(path, 9, "0" * 40))
+        self.assertFalse(font_archiver._is_blob_unchanged(path, 9, None))
+        self.assertFalse(font_archiver._is_blob_unchanged(path + ".missing", 9, sha))
+
+
+class ArchiveWorkerCountTest(unittest.TestCase):
+    def setUp(self):
+        font_archiver._get_archive_worker_count.cache_clear()
+        self.addCleanup(font_archiver._get_archive_worker_count.cache_clear)
+
+    def test_invalid_override_is_reported_once(self):
+        with mock.patch.dict(os.environ, {"FONT_ARCHIVER_WORKERS": "many"}), \
+                mock.patch.object(font_archiver.logger, "warning") as warning:
+            counts = {font_archiver._get_archive_worker_count() for _ in range(3)}
+
+        self.assertEqual(counts, {min(font_archiver._get_cpu_core_count(), font_archiver.MAX_ARCHIVE_WORKERS)})
+        warning.assert_called_once()
+
+    def test_valid_override(self):
+        with mock.patch.dict(os.environ, {"FONT_ARCHIVER_WORKERS": "3"}):
+            self.assertEqual(font_archiver._get_archive_worker_count(), 3)
+
+
+class NameNormalizationTest(unittest.TestCase):
+    def test_normalize_nerd_font_name(self):
+        cases = {
+            "JetBrainsMono Nerd Font Mono": "JetBrainsMono Nerd Font",
+            "Hack NERD FONT Propo": "Hack Nerd Font",
+            "FiraCode nerd font": "FiraCode nerd font",
+            "Hack Nerd Font": "Hack Nerd Font",
+            "Arial": "Arial",
+        }
+        for family_name, expected in cases.items():
+            with self.subTest(family_name=family_name):
+                self.assertEqual(font_archiver.normalize_nerd_font_name(family_name), expected)
+
+    def test_sanitize_name(self):
+        cases = {
+            "Noto Sans (CJK)/JP": "Noto_Sans__CJK__JP",
+            "Source-Code.Pro_2": "Source-Code.Pro_2",
+            "Café Ünicode": "Café_Ünicode",
+        }
+        for family_name, expected in cases.items():
+            with self.subTest(family_name=family_name):
+                self.assertEqual(font_archiver._sanitize_name(family_name), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()